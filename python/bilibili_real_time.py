@@ -2,8 +2,6 @@ import asyncio
 import logging
 import argparse
 from datetime import datetime
-from bilibili_api import video
-import requests
 
 ## 配置日志
 logging.basicConfig(
@@ -24,6 +22,9 @@ parser.add_argument('bv_id', type=str, help='The BV ID of the video to monitor.'
 args = parser.parse_args()
 
 async def fetch_video_data(bvid: str) -> None:
+    ## 解析完参数后再导入 bilibili_api，--help 等无需等待
+    from bilibili_api import video
+
     ## 实例化 Video 类
     v = video.Video(bvid=bvid)  ## 使用传入的 BV 号
     ## 获取信息
@@ -82,6 +83,7 @@ async def fetch_video_data(bvid: str) -> None:
     await send_to_feishu(card_message)
 
 async def send_to_feishu(data):
+    import requests
     requests.post(FEISHU_WEBHOOK_URL, json=data)
 
 ## 主函数
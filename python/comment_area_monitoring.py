@@ -1,13 +1,18 @@
-from bilibili_api import comment, Credential
 import asyncio
+import importlib.util
 import json
-import pandas as pd
 from datetime import datetime, timedelta
 import os
 import sys
 import logging
 import argparse
 
+## 飞书 Webhook URL
+FEISHU_WEBHOOK_URL = '<https://open.feishu.cn/open-apis/bot/>'  ## 输入飞书 Bot url
+
+## 每张飞书卡片最多包含的评论数，避免逐条推送刷屏
+ALERT_BATCH_SIZE = 10
+
 ## 配置日志
 def setup_logging(bvid):
     log_dir = os.path.join(r'G:\\zdh\\data\\comments', bvid)
@@ -45,6 +50,140 @@ def write_last_run_time(bvid, timestamp):
         ## 写入时间戳和可读时间
         f.write(f"{timestamp} ## {readable_time}\\n")
 
+## 定义已提醒评论记录文件路径
+def get_alerted_file(bvid):
+    return os.path.join(r'G:\\zdh\\data\\comments', bvid, 'alerted_rpids.txt')
+
+def read_alerted_rpids(bvid):
+    """读取已推送过提醒的评论 rpid"""
+    alerted_file = get_alerted_file(bvid)
+    if os.path.exists(alerted_file):
+        with open(alerted_file, 'r') as f:
+            return {int(line) for line in f.read().split() if line.isdigit()}
+    return set()
+
+def write_alerted_rpids(bvid, rpids):
+    """追加写入本次推送成功的评论 rpid"""
+    with open(get_alerted_file(bvid), 'a') as f:
+        f.writelines(f"{rpid}\n" for rpid in rpids)
+
+## 定义待推送提醒记录文件路径
+def get_pending_alerts_file(bvid):
+    return os.path.join(r'G:\\zdh\\data\\comments', bvid, 'pending_alerts.json')
+
+def read_pending_alerts(bvid):
+    """读取上次运行未推送成功的关键词评论"""
+    pending_file = get_pending_alerts_file(bvid)
+    if os.path.exists(pending_file):
+        with open(pending_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+def write_pending_alerts(bvid, comments):
+    """覆盖写入尚未推送成功的关键词评论，为空时删除文件"""
+    pending_file = get_pending_alerts_file(bvid)
+    if comments:
+        with open(pending_file, 'w', encoding='utf-8') as f:
+            json.dump(comments, f, ensure_ascii=False)
+    elif os.path.exists(pending_file):
+        os.remove(pending_file)
+
+def build_alert_card(bvid, comments, keywords):
+    """将同一视频的关键词评论合并为一张飞书卡片"""
+    lines = []
+    for c in comments:
+        hit_keywords = '、'.join(k for k in keywords if k in c['message'])
+        comment_time = datetime.fromtimestamp(c['ctime']).strftime('%m/%d %H:%M')
+        lines.append(
+            f"**{c['uname']}**（{c['ip_location']}，{comment_time}，👍 {c['like']}）命中 **{hit_keywords}**\n"
+            f"{c['message']} [查看]({c['comment_url']})"
+        )
+
+    ## 构建飞书卡片消息格式，与 bilibili_real_time 的卡片保持一致
+    return {
+        "msg_type": "interactive",
+        "card": {
+            "config": {
+                "wide_screen_mode": True
+            },
+            "header": {
+                "title": {
+                    "tag": "plain_text",
+                    "content": f"{bvid} | 评论区关键词提醒 {len(comments)} 条"
+                },
+                "template": "red"  ## 设置标题主题颜色
+            },
+            "elements": [
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": "\n\n".join(lines)
+                    }
+                }
+            ]
+        }
+    }
+
+def queue_alerts(queue, bvid, comments, keywords):
+    """
+    合并上次未推送成功的评论，按 rpid 去重后分批放入发送队列
+    放入队列前先写入待推送记录，发送中断时下次运行可重新推送
+    
+    :return: 放入队列的评论列表
+    """
+    alerted = read_alerted_rpids(bvid)
+    pending = {}
+    for c in read_pending_alerts(bvid) + comments:
+        if c['rpid'] not in alerted:
+            pending.setdefault(c['rpid'], c)
+    pending = list(pending.values())
+    write_pending_alerts(bvid, pending)
+
+    for i in range(0, len(pending), ALERT_BATCH_SIZE):
+        batch = pending[i:i + ALERT_BATCH_SIZE]
+        queue.put_nowait((build_alert_card(bvid, batch, keywords), [c['rpid'] for c in batch]))
+    return pending
+
+def post_to_feishu(card_message):
+    """
+    发送卡片到飞书 Webhook，返回飞书的 JSON 响应
+    使用标准库请求，不额外依赖 requests（bilibili-api-python 不会安装它）
+    """
+    import urllib.request
+
+    request = urllib.request.Request(
+        FEISHU_WEBHOOK_URL,
+        data=json.dumps(card_message).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    ## 非 2xx 状态码时 urlopen 抛出 HTTPError
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+async def feishu_sender(queue, bvid):
+    """从队列中取出卡片发送到飞书，发送成功后记录 rpid，收到 None 时退出"""
+    while True:
+        item = await queue.get()
+        try:
+            if item is None:
+                return
+            card_message, rpids = item
+            ## 在线程中发送，不阻塞评论抓取与 Excel 写入
+            result = await asyncio.to_thread(post_to_feishu, card_message)
+            ## 飞书机器人出错时（限流、签名或关键词校验失败等）仍返回 200，需检查返回码
+            code = result.get('code', result.get('StatusCode'))
+            if code != 0:
+                raise RuntimeError(f"飞书返回错误 {code}: {result.get('msg', result.get('StatusMessage'))}")
+            write_alerted_rpids(bvid, rpids)
+            logging.info(f"已推送 {len(rpids)} 条关键词评论提醒")
+        except Exception as e:
+            ## 发送失败的批次不写入已提醒记录
+            logging.error(f"推送飞书提醒时出错: {e}")
+        finally:
+            queue.task_done()
+
 def flatten_comment(comment, bvid):
     """展平单个评论"""
     try:
@@ -90,6 +229,8 @@ def extract_comments(comments, bvid, last_run_time):
 
 async def get_new_comments(bvid, last_run_time):
     """获取视频的新评论"""
+    from bilibili_api import comment
+
     comments = []
     page = 1
     
@@ -122,11 +263,14 @@ async def get_new_comments(bvid, last_run_time):
     
     return comments
 
-def append_to_excel(new_df, bvid):
+def append_to_excel(new_comments, bvid):
     """
-    追加新数据到现有Excel文件
+    追加新评论到现有Excel文件
     如果文件不存在，则创建新文件
     """
+    import pandas as pd
+
+    new_df = pd.DataFrame(new_comments)
     filename = os.path.join(r'G:\\zdh\\data\\comments', bvid, f'{bvid}_comments.xlsx')
     
     try:
@@ -172,11 +316,35 @@ async def main(bvid):
         ## 记录关键词评论
         logging.info(f"包含关键词的评论共 {len(filtered_comments)} 条")
         
-        ## 转换为 DataFrame
-        df = pd.DataFrame(flattened_comments)
+        ## 关键词评论合并成卡片后放入队列，由后台任务推送到飞书
+        alert_queue = asyncio.Queue()
+        sender = asyncio.create_task(feishu_sender(alert_queue, bvid))
+        try:
+            alert_comments = queue_alerts(alert_queue, bvid, filtered_comments, FILTER_KEYWORDS)
+        except Exception as e:
+            logging.error(f"准备飞书提醒时出错: {e}", exc_info=True)
+            alert_comments = None
+        finally:
+            alert_queue.put_nowait(None)
+        if alert_comments is not None:
+            logging.info(f"待推送关键词评论 {len(alert_comments)} 条")
+        
+        ## 导出到 xlsx 文件，使用追加模式；在线程中执行，与飞书推送并行
+        await asyncio.to_thread(append_to_excel, flattened_comments, bvid)
         
-        ## 导出到 xlsx 文件，使用追加模式
-        append_to_excel(df, bvid)
+        ## 等待提醒发送完毕，未成功的评论留待下次运行重新推送
+        ## 推送出错不影响记录本次运行时间，否则下次运行会重复抓取同一批评论
+        try:
+            await sender
+        except Exception as e:
+            logging.error(f"飞书推送任务出错: {e}", exc_info=True)
+        ## 准备提醒失败时保留原有的待推送记录
+        if alert_comments is not None:
+            alerted = read_alerted_rpids(bvid)
+            unsent = [c for c in alert_comments if c['rpid'] not in alerted]
+            write_pending_alerts(bvid, unsent)
+            if unsent:
+                logging.warning(f"有 {len(unsent)} 条关键词评论推送失败，将在下次运行时重试")
         
         ## 记录本次运行时间
         current_timestamp = int(datetime.now().timestamp())
@@ -186,15 +354,6 @@ async def main(bvid):
     except Exception as e:
         logging.error(f"脚本执行出错: {e}", exc_info=True)
 
-## 添加依赖检查
-try:
-    import bilibili_api
-    import pandas as pd
-except ImportError as e:
-    print(f"缺少必要依赖: {e}")
-    print("请运行 pip install bilibili-api-python pandas openpyxl")
-    sys.exit(1)
-
 if __name__ == "__main__":
     ## 设置命令行参数解析
     parser = argparse.ArgumentParser(description='bilibili评论爬取脚本')
@@ -203,6 +362,15 @@ if __name__ == "__main__":
     ## 解析参数
     args = parser.parse_args()
     
+    ## 添加依赖检查，只查找不导入，实际导入推迟到使用时
+    missing = [name for name in ('bilibili_api', 'pandas', 'openpyxl') if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"缺少必要依赖: {', '.join(missing)}")
+        print("请运行 pip install bilibili-api-python pandas openpyxl")
+        sys.exit(1)
+    
+    from bilibili_api import Credential
+    
     ## 实例化 Credential
     credential = Credential(
         sessdata="your_sessdata",
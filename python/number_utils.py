@@ -0,0 +1,59 @@
+## 各平台导出数据共用的数量解析，to_party_a_bilibili 与 to_party_a_douyin 均使用
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+## 数量单位及其倍数，w/k 为常见的拼音、英文缩写
+COUNT_MULTIPLIERS = {
+    '亿': 100000000,
+    '万': 10000,
+    'w': 10000,
+    '千': 1000,
+    'k': 1000,
+    '%': 0.01,
+}
+
+## 数值部分 + 可选单位 + 可选 '+'，例如 '1.2w'、'10万'、'12.5%'、'10万+'
+## '10万+' 为平台显示的封顶值（如公众号阅读数），按下限 100000 计
+COUNT_PATTERN = r'^([-+]?\d*\.?\d+)(亿|万|w|千|k|%)?\+?$'
+
+def convert_count_series(series):
+    """
+    将整列数量文字一次性转换为数值，无法解析的值为空
+    数量四舍五入为整数（Int64），含百分比的列保留小数（float64）
+    例如：
+    '10万次播放' -> 100000
+    '1.2w' -> 12000
+    '3,456' -> 3456
+    '12.5%' -> 0.125
+    '10万+' -> 100000
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.astype('float64')
+        if (values.dropna() % 1 == 0).all():
+            return values.astype('Int64')
+        return values
+
+    text = (
+        series.astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace(r'[,，\s]|次播放|次', '', regex=True)
+    )
+    parts = text.str.extract(COUNT_PATTERN)
+    numbers = pd.to_numeric(parts[0], errors='coerce')
+    multipliers = parts[1].map(COUNT_MULTIPLIERS).fillna(1)
+    is_percent = parts[1] == '%'
+    ## 带单位的数量相乘后有浮点误差，如 2.3亿 -> 229999999.99999997，取整消除
+    values = (numbers * multipliers).where(is_percent, (numbers * multipliers).round())
+    
+    ## 非空但无法解析的值记录日志，避免报表数据被静默清空
+    failed = values.isna() & series.notna() & ~text.isin(['', 'nan', 'none'])
+    if failed.any():
+        examples = series[failed].astype(str).unique()[:3].tolist()
+        logger.warning(f"列 {series.name} 有 {failed.sum()} 个值无法解析为数值，例如: {examples}")
+    
+    if is_percent.any():
+        return values
+    return values.astype('Int64')
@@ -1,22 +1,19 @@
 import os
-import sys
 import re
 import pandas as pd
+from number_utils import convert_count_series
 import traceback
 from datetime import datetime
-import urllib3
-import yt_dlp
-import requests
 import json
 import logging
+import csv
+import time
+import argparse
 
 ## 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-## 禁用 SSL 警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 def format_youtube_date(date_str):
     try:
         if date_str and len(date_str) == 8:
@@ -35,6 +32,9 @@ def format_weibo_date(date_str):
         return date_str
 
 def get_video_info(video_url):
+    ## 仅在输入了 YouTube 链接时才导入 yt_dlp
+    import yt_dlp
+
     ydl_opts = {
         'quiet': True,
         'format': 'best',
@@ -55,9 +55,9 @@ def get_video_info(video_url):
                 title, 
                 video_url, 
                 upload_date, 
-                str(view_count), 
-                str(like_count), 
-                str(comment_count)
+                view_count, 
+                like_count, 
+                comment_count
             ]
     except Exception as e:
         print(f"获取YouTube视频信息失败: {e}")
@@ -73,29 +73,22 @@ def convert_play_count(play_count_str):
     """
     if not play_count_str:
         return 0
-    
-    play_count_str = str(play_count_str).replace('次播放', '').replace(' ', '')
-    
-    multipliers = {
-        '万': 10000,
-        '千': 1000,
-    }
-    
-    for unit, multiplier in multipliers.items():
-        if unit in play_count_str:
-            try:
-                number = float(play_count_str.replace(unit, ''))
-                return int(number * multiplier)
-            except ValueError:
-                return 0
-    
-    try:
-        return int(play_count_str)
-    except ValueError:
+
+    value = convert_count_series(pd.Series([str(play_count_str)], name='播放量')).iloc[0]
+    if pd.isna(value):
         return 0
+    ## 百分比为小数，不能按整数截断
+    return int(value) if value % 1 == 0 else float(value)
 
 def get_single_weibo(weibo_id, headers=None):
     """获取指定ID的单条微博信息"""
+    ## 仅在输入了微博链接时才导入 requests
+    import requests
+    import urllib3
+
+    ## 禁用 SSL 警告
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
     if headers is None:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/86.0.4240.111 Safari/537.36'
@@ -127,10 +120,10 @@ def get_single_weibo(weibo_id, headers=None):
                 '标题': weibo_info['text'],
                 '链接': f"<https://weibo.com/{weibo_info['user']['id']}/{weibo_info['bid']}>",
                 '发布时间': format_weibo_date(weibo_info['created_at']),
-                '播放量': str(play_count),
-                '点赞': str(weibo_info['attitudes_count']),
-                '评论': str(weibo_info['comments_count']),
-                '转发': str(weibo_info['reposts_count'])
+                '播放量': play_count,
+                '点赞': weibo_info['attitudes_count'],
+                '评论': weibo_info['comments_count'],
+                '转发': weibo_info['reposts_count']
             }
             
             return list(weibo.values())
@@ -152,131 +145,322 @@ def match_column(df, target_columns):
                 return col
     return None
 
-def process_files(search_keyword, input_dir=None, sub_folder=None):
-    ## 如果没有提供输入目录，使用默认路径
+## 支持的报表格式
+OUTPUT_FORMATS = ('xlsx', 'csv')
+
+class ReportWriter:
+    """
+    按数据块流式写出报表，不在内存中保留整个报表
+    xlsx 使用 openpyxl 只写模式，csv 逐块追加
+    """
+
+    def __init__(self, file_path, columns):
+        self.file_path = file_path
+        self.columns = columns
+        self.row_count = 0
+        if not file_path.endswith(tuple(f'.{fmt}' for fmt in OUTPUT_FORMATS)):
+            raise ValueError(f"不支持的报表格式: {file_path}，仅支持 {'/'.join(OUTPUT_FORMATS)}")
+        if file_path.endswith('.csv'):
+            self._file = open(file_path, 'w', encoding='utf-8-sig', newline='')
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(columns)
+        else:
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._sheet.append(columns)
+
+    def write(self, df):
+        """写入一个数据块，缺失值写为空单元格"""
+        df = df.reindex(columns=self.columns).astype(object)
+        df = df.where(df.notna(), None)
+        for row in df.itertuples(index=False, name=None):
+            if self.file_path.endswith('.csv'):
+                self._csv.writerow(row)
+            else:
+                self._sheet.append(row)
+        self.row_count += len(df)
+
+    def close(self):
+        if self.file_path.endswith('.csv'):
+            self._file.close()
+        else:
+            self._workbook.save(self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+## 平台处理顺序
+PLATFORM_ORDER = ['bilibili', '抖音', '小红书', '公众号', '视频号', '快手', '头条号']
+
+## 输出列及其可能的列名
+OUTPUT_COLUMNS = {
+    '平台': '',
+    '标题': '作品/标题/描述',
+    '链接': '链接/url',
+    '发布时间': '发布时间/发表时间',
+    '播放量': '播放量/观看量/总阅读次数',
+    '点赞': '点赞/喜欢',
+    '评论': '评论',
+    '转发': '转发/转发次数/分享',
+    '收藏': '收藏'
+}
+
+## 需要转换为数值的输出列
+NUMERIC_COLUMNS = ['播放量', '点赞', '评论', '转发', '收藏']
+
+## 输出目录
+OUTPUT_DIR = 'G:\\\\zdh\\\\to_party_a'
+
+def get_input_dir(input_dir=None, sub_folder=None):
+    """如果没有提供输入目录，使用默认路径"""
     if input_dir is None:
         today = datetime.now().strftime("%Y-%m-%d")
         input_dir = os.path.join('G:\\\\zdh\\\\platformdata', today)
         if sub_folder:
             input_dir = os.path.join(input_dir, sub_folder)
+    return input_dir
+
+def get_output_file_path(output_format='xlsx'):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_filename = f'output_{datetime.now().strftime("%Y%m%d%H%M%S")}.{output_format}'
+    return os.path.join(OUTPUT_DIR, output_filename)
+
+def is_input_file(filename):
+    return (
+        filename.endswith(('.csv', '.xlsx', '.xls', '.et'))
+        and not filename.startswith('~$')
+        and not filename.startswith('.')
+    )
+
+def platform_sort_key(file_path):
+    """按平台顺序排序"""
+    return next((i for i, p in enumerate(PLATFORM_ORDER) if p in os.path.basename(file_path)), len(PLATFORM_ORDER))
+
+def list_input_files(input_dir):
+    """获取所有输入文件，按平台顺序排序"""
+    input_files = [os.path.join(input_dir, f) for f in os.listdir(input_dir) if is_input_file(f)]
+    input_files.sort(key=platform_sort_key)
+    return input_files
+
+def process_file(file_path, search_keyword):
+    """
+    处理单个平台文件，返回匹配行组成的数据块
+    未找到匹配项时返回 None，读取失败时抛出异常
+    """
+    filename = os.path.basename(file_path)
+    platform = extract_platform_name(filename)
+    print(f"\\n正在处理文件: {filename}")
     
-    ## 平台处理顺序
-    platform_order = ['bilibili', '抖音', '小红书', '公众号', '视频号', '快手', '头条号']
+    ## 读取文件
+    if file_path.endswith('.csv'):
+        df = pd.read_csv(file_path, encoding='utf-8-sig')
+    elif file_path.endswith('.xls'):
+        df = pd.read_excel(file_path, engine='xlrd')
+    else:
+        if '小红书' in filename:
+            df = pd.read_excel(file_path, header=1)
+        else:
+            df = pd.read_excel(file_path, engine='openpyxl')
     
-    ## 输出列及其可能的列名
-    output_columns = {
-        '平台': '',
-        '标题': '作品/标题/描述',
-        '链接': '链接/url',
-        '发布时间': '发布时间/发表时间',
-        '播放量': '播放量/观看量/总阅读次数',
-        '点赞': '点赞/喜欢',
-        '评论': '评论',
-        '转发': '转发/转发次数/分享',
-        '收藏': '收藏'
-    }
+    print(f"文件列名: {list(df.columns)}")
+    print(f"文件行数: {len(df)}")
     
-    ## 输出目录和文件名
-    output_dir = 'G:\\\\zdh\\\\to_party_a'
-    os.makedirs(output_dir, exist_ok=True)
-    output_filename = f'output_{datetime.now().strftime("%Y%m%d%H%M%S")}.xlsx'
-    output_file_path = os.path.join(output_dir, output_filename)
+    ## 在第一列中搜索关键词
+    matched_rows = df[df.iloc[:, 0].astype(str).str.contains(search_keyword, case=False, na=False)]
     
-    ## 获取所有输入文件，按指定顺序排序
-    input_files = [
-        os.path.join(input_dir, f) 
-        for f in os.listdir(input_dir)
-        if f.endswith(('.csv', '.xlsx', '.xls', '.et')) 
-        and not f.startswith('~$') 
-        and not f.startswith('.')
-    ]
+    if matched_rows.empty:
+        print(f"文件 {filename} 未找到匹配项")
+        return None
     
-    ## 按平台顺序排序
-    input_files.sort(key=lambda x: next((i for i, p in enumerate(platform_order) if p in os.path.basename(x)), len(platform_order)))
+    print(f"找到 {len(matched_rows)} 行匹配数据")
     
-    ## 初始化输出行
-    output_rows = [list(output_columns.keys())]
+    ## 按列整体取值，数值列一次性转换
+    block = pd.DataFrame(index=matched_rows.index)
+    block['平台'] = platform
+    for col_name, possible_names in list(OUTPUT_COLUMNS.items())[1:]:
+        matched_col = match_column(df, possible_names) if possible_names else None
+        if matched_col is None:
+            block[col_name] = float('nan') if col_name in NUMERIC_COLUMNS else ''
+        elif col_name in NUMERIC_COLUMNS:
+            block[col_name] = convert_count_series(matched_rows[matched_col])
+        else:
+            block[col_name] = matched_rows[matched_col].astype(str)
     
-    for file_path in input_files:
-        filename = os.path.basename(file_path)
-        platform = extract_platform_name(filename)
-        print(f"\\n正在处理文件: {filename}")
-        
-        try:
-            ## 读取文件
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8-sig')
-            elif file_path.endswith('.xls'):
-                df = pd.read_excel(file_path, engine='xlrd')
-            else:
-                if '小红书' in filename:
-                    df = pd.read_excel(file_path, header=1)
-                else:
-                    df = pd.read_excel(file_path, engine='openpyxl')
-            
-            print(f"文件列名: {list(df.columns)}")
-            print(f"文件行数: {len(df)}")
-            
-            ## 在第一列中搜索关键词
-            matched_rows = df[df.iloc[:, 0].astype(str).str.contains(search_keyword, case=False, na=False)]
-            
-            if not matched_rows.empty:
-                print(f"找到 {len(matched_rows)} 行匹配数据")
-                
-                for _, row in matched_rows.iterrows():
-                    ## 创建新行
-                    new_row = [platform]
-                    
-                    ## 匹配其他列
-                    for col_name, possible_names in list(output_columns.items())[1:]:
-                        if possible_names:
-                            matched_col = match_column(df, possible_names)
-                            value = row[matched_col] if matched_col else ''
-                            new_row.append(str(value))
-                        else:
-                            new_row.append('')
-                    
-                    output_rows.append(new_row)
-            else:
-                print(f"文件 {filename} 未找到匹配项")
-        
-        except Exception as e:
-            print(f"处理文件 {filename} 时出错: {e}")
-            traceback.print_exc()
+    return block
+
+def process_files(search_keyword, input_dir=None, sub_folder=None, output_format='xlsx'):
+    input_dir = get_input_dir(input_dir, sub_folder)
+    output_file_path = get_output_file_path(output_format)
+    columns = list(OUTPUT_COLUMNS)
+    
+    ## 每个文件的匹配结果作为一个数据块，处理完立即写出
+    with ReportWriter(output_file_path, columns) as writer:
+        for file_path in list_input_files(input_dir):
+            try:
+                block = process_file(file_path, search_keyword)
+                if block is not None:
+                    writer.write(block)
+            except Exception as e:
+                print(f"处理文件 {os.path.basename(file_path)} 时出错: {e}")
+                traceback.print_exc()
+    
+        ## 询问微博和 YouTube 链接
+        print("\\n请输入微博链接（以空格分隔，没有则直接回车）:")
+        weibo_links = input().split()
     
-    ## 询问微博和 YouTube 链接
-    print("\\n请输入微博链接（以空格分隔，没有则直接回车）:")
-    weibo_links = input().split()
+        for link in weibo_links:
+            weibo_id = link.split('/')[-1]
+            weibo_data = get_single_weibo(weibo_id)
+            if weibo_data:
+                writer.write(pd.DataFrame([weibo_data], columns=columns[:len(weibo_data)]))
     
-    for link in weibo_links:
-        weibo_id = link.split('/')[-1]
-        weibo_data = get_single_weibo(weibo_id)
-        if weibo_data:
-            output_rows.append(weibo_data)
+        print("\\n请输入 YouTube 链接（以空格分隔，没有则直接回车）:")
+        youtube_links = input().split()
+    
+        for link in youtube_links:
+            youtube_data = get_video_info(link)
+            if youtube_data:
+                writer.write(pd.DataFrame([youtube_data], columns=columns[:len(youtube_data)]))
+    
+    print(f"\\n共写出 {writer.row_count} 行，匹配结果已保存到: {output_file_path}")
+
+def scan_input_files(input_dir):
+    """返回目录中输入文件的 (修改时间, 大小) 签名"""
+    signatures = {}
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and is_input_file(entry.name):
+                stat = entry.stat()
+                signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+def same_block(old, new):
+    """判断文件重新处理后的匹配结果是否变化"""
+    if old is None or new is None:
+        return old is None and new is None
+    return old.equals(new)
+
+def watch_files(search_keyword, input_dir=None, sub_folder=None, output_format='xlsx', poll_interval=30):
+    """
+    监控输入目录，只重新处理新增或修改过的平台文件，并增量更新报表
+    Linux 上优先使用 inotify（需要 inotify_simple），否则按间隔轮询
+    未指定 input_dir 时跟随当天日期目录，跨天后切换目录并生成新报表
+    """
+    columns = list(OUTPUT_COLUMNS)
     
-    print("\\n请输入 YouTube 链接（以空格分隔，没有则直接回车）:")
-    youtube_links = input().split()
+    ## inotify 为可选依赖，不可用时改为轮询
+    try:
+        from inotify_simple import INotify, flags as inotify_flags
+    except ImportError:
+        INotify = None
     
-    for link in youtube_links:
-        youtube_data = get_video_info(link)
-        if youtube_data:
-            output_rows.append(youtube_data)
+    inotify = None
+    watched_dir = None
     
-    ## 保存输出文件
-    output_df = pd.DataFrame(output_rows[1:], columns=output_rows[0])
-    output_df.to_excel(output_file_path, index=False)
-    print(f"\\n匹配结果已保存到: {output_file_path}")
+    try:
+        while True:
+            ## 每轮重新解析目录，跨天后切换到新的日期目录
+            current_dir = get_input_dir(input_dir, sub_folder)
+            if current_dir != watched_dir:
+                try:
+                    ## 先启动监控、后有导出文件是常见情况，目录不存在时先创建
+                    os.makedirs(current_dir, exist_ok=True)
+                except OSError as e:
+                    logger.error(f"无法创建输入目录 {current_dir}: {e}")
+                    time.sleep(poll_interval)
+                    continue
+                
+                watched_dir = current_dir
+                output_file_path = get_output_file_path(output_format)
+                ## 每个文件已处理时的签名及其匹配结果，处理失败的文件签名单独记录
+                processed = {}
+                blocks = {}
+                failed = {}
+                dirty = False
+                
+                if INotify is not None:
+                    if inotify is not None:
+                        inotify.close()
+                    inotify = INotify()
+                    inotify.add_watch(watched_dir, inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.DELETE)
+                    logger.info(f"使用 inotify 监控目录: {watched_dir}")
+                else:
+                    logger.info(f"使用轮询监控目录: {watched_dir}，间隔 {poll_interval} 秒")
+            
+            try:
+                signatures = scan_input_files(watched_dir)
+            except OSError as e:
+                logger.error(f"扫描目录 {watched_dir} 时出错: {e}")
+                signatures = None
+            
+            if signatures is not None:
+                changed = [
+                    f for f, sig in signatures.items()
+                    if processed.get(f) != sig and failed.get(f) != sig
+                ]
+                removed = [f for f in processed if f not in signatures]
+                
+                for file_path in removed:
+                    processed.pop(file_path)
+                    if blocks.pop(file_path, None) is not None:
+                        dirty = True
+                for file_path in [f for f in failed if f not in signatures]:
+                    failed.pop(file_path)
+                
+                for file_path in sorted(changed, key=platform_sort_key):
+                    try:
+                        block = process_file(file_path, search_keyword)
+                    except Exception as e:
+                        ## 文件可能仍在写入或格式不支持，记录签名，文件再次变动时才重试
+                        failed[file_path] = signatures[file_path]
+                        print(f"处理文件 {os.path.basename(file_path)} 时出错: {e}")
+                        continue
+                    failed.pop(file_path, None)
+                    processed[file_path] = signatures[file_path]
+                    if not same_block(blocks.get(file_path), block):
+                        dirty = True
+                    blocks[file_path] = block
+            
+            if dirty:
+                ## 只有匹配结果变化时才重写，未变动文件的数据块直接复用
+                try:
+                    with ReportWriter(output_file_path, columns) as writer:
+                        for file_path in sorted(blocks, key=platform_sort_key):
+                            if blocks[file_path] is not None:
+                                writer.write(blocks[file_path])
+                    dirty = False
+                    print(f"\\n共写出 {writer.row_count} 行，报表已更新: {output_file_path}")
+                except OSError as e:
+                    ## 例如报表正在 Excel 中打开，下一轮再写
+                    logger.error(f"写入报表 {output_file_path} 时出错: {e}")
+            
+            ## 等待下一次变动；inotify 也设置超时，以便跨天切换目录和重试写入
+            if inotify is not None:
+                inotify.read(timeout=poll_interval * 1000, read_delay=1000)
+            else:
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\\n已停止监控")
+    finally:
+        if inotify is not None:
+            inotify.close()
 
 ## 主程序入口
 if __name__ == '__main__':
-    ## 检查命令行参数
-    if len(sys.argv) < 2:
-        print("用法: python 脚本.py <搜索关键词> [子文件夹]")
-        sys.exit(1)
-    
-    ## 获取命令行参数
-    search_keyword = sys.argv[1]
-    sub_folder = sys.argv[2] if len(sys.argv) > 2 else None
+    ## 设置命令行参数解析
+    parser = argparse.ArgumentParser(description='按关键词汇总各平台数据，输出给甲方的报表')
+    parser.add_argument('search_keyword', help='搜索关键词')
+    parser.add_argument('sub_folder', nargs='?', default=None, help='当天数据目录下的子文件夹')
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='xlsx', help='报表格式，默认 xlsx')
+    parser.add_argument('--watch', action='store_true', help='监控输入目录，只处理新增或修改的文件')
+    args = parser.parse_args()
     
     ## 调用处理函数
-    process_files(search_keyword, sub_folder=sub_folder)
\ No newline at end of file
+    if args.watch:
+        watch_files(args.search_keyword, sub_folder=args.sub_folder, output_format=args.output_format)
+    else:
+        process_files(args.search_keyword, sub_folder=args.sub_folder, output_format=args.output_format)
@@ -1,8 +1,110 @@
 import os
 import pandas as pd
+from number_utils import convert_count_series
 import glob
 from datetime import datetime
 
+## 各列的类型：读取后在内存中统一转换一次，后续无需再解析字符串
+## Douyin_Daily.xlsx 中的原始值保持不变，无法解析的值只在内存中记为空
+PERCENT_COLUMNS = ['完播率', '5s完播率', '封面点击率', '2s跳出率']
+DURATION_COLUMNS = ['平均播放时长']
+COUNT_COLUMNS = [
+    '播放量', '点赞量', '分享量', '评论量', '收藏量', '主页访问量', '粉丝增量',
+    '小红书-观看量', '小红书-点赞', '小红书-涨粉',
+    '快手-播放量', '快手-点赞量', '快手-涨粉量',
+    '视频号-播放量',
+    'bilibili2-播放量', 'bilibili2-涨粉量'
+]
+CATEGORY_COLUMNS = ['体裁', '审核状态']
+DATETIME_COLUMNS = ['发布时间']
+
+## 各平台互动率：互动列之和 / 播放列
+ENGAGEMENT_COLUMNS = {
+    '抖音-互动率': ('播放量', ['点赞量', '分享量', '评论量', '收藏量']),
+    '小红书-互动率': ('小红书-观看量', ['小红书-点赞']),
+    '快手-互动率': ('快手-播放量', ['快手-点赞量']),
+}
+
+## 跨平台合计
+TOTAL_COLUMNS = {
+    '全平台-播放量': ['播放量', '小红书-观看量', '快手-播放量', '视频号-播放量', 'bilibili2-播放量'],
+    '全平台-涨粉量': ['粉丝增量', '小红书-涨粉', '快手-涨粉量', 'bilibili2-涨粉量'],
+}
+
+def to_duration_column(series):
+    """
+    将整列时长转换为秒数，已是数值类型的列直接返回
+    例如：
+    '15.2s' -> 15.2
+    '1分20秒' -> 80.0
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64')
+
+    text = series.astype(str).str.strip().str.replace(',', '', regex=False)
+    parts = text.str.extract(r'^(?:(\d+(?:\.\d+)?)(?:分|min|m))?(\d+(?:\.\d+)?)?(?:s|秒)?$')
+    minutes = pd.to_numeric(parts[0], errors='coerce')
+    seconds = pd.to_numeric(parts[1], errors='coerce')
+    ## 分、秒都缺失时为空
+    return (minutes.fillna(0) * 60 + seconds.fillna(0)).where(minutes.notna() | seconds.notna()).astype('float64')
+
+def to_datetime_column(series):
+    """
+    将整列转换为时间，先按整列统一格式解析，失败的值再逐个解析
+    例如 '2024-05-02'、'2024年05月01日 12:00' 混在同一列
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    text = series.astype(str).str.strip().str.replace(r'[年月]', '-', regex=True).str.replace('日', '', regex=False)
+    parsed = pd.to_datetime(text, errors='coerce')
+    failed = parsed.isna() & series.notna()
+    if failed.any():
+        parsed[failed] = text[failed].map(lambda v: pd.to_datetime(v, errors='coerce'))
+    return parsed
+
+def normalize_dtypes(df):
+    """按列类型表转换数据类型，可重复调用"""
+    df = df.copy()
+    ## 数量与百分比使用与 to_party_a_bilibili 相同的解析，支持 '1.2w'、'10万+'、'12.5%' 等
+    for col in PERCENT_COLUMNS:
+        if col in df.columns:
+            df[col] = convert_count_series(df[col]).astype('float64')
+    for col in DURATION_COLUMNS:
+        if col in df.columns:
+            df[col] = to_duration_column(df[col])
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = convert_count_series(df[col])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = to_datetime_column(df[col])
+    return df
+
+def add_derived_metrics(df):
+    """按列整体计算各平台互动率与跨平台合计，缺少来源列的指标跳过"""
+    df = df.copy()
+    for col, (view_col, interaction_cols) in ENGAGEMENT_COLUMNS.items():
+        interaction_cols = [c for c in interaction_cols if c in df.columns]
+        if view_col not in df.columns or not interaction_cols:
+            continue
+        views = df[view_col]
+        interactions = df[interaction_cols].sum(axis=1, min_count=1)
+        ## 播放量为 0 或缺失时互动率记为空，避免除以零
+        df[col] = (interactions / views).where((views > 0).fillna(False))
+    for col, source_cols in TOTAL_COLUMNS.items():
+        source_cols = [c for c in source_cols if c in df.columns]
+        if source_cols:
+            df[col] = df[source_cols].sum(axis=1, min_count=1)
+    return df
+
+def load_daily_metrics(output_file):
+    """读取 Douyin_Daily 并返回已转换类型的数据，供周报等汇总使用"""
+    return add_derived_metrics(normalize_dtypes(pd.read_excel(output_file)))
+
 def process_files(search_keyword, input_dir=None, sub_folder=None):
     ## 输出路径和文件名
     output_dir = r'G:\\zdh\\data'
@@ -111,10 +213,12 @@ def process_files(search_keyword, input_dir=None, sub_folder=None):
     if not new_row.empty and not new_row.loc[0].isnull().all():
         df_output = pd.concat([df_output, new_row], ignore_index=True)
 
-    ## 保存结果
+    ## 保存结果，文件中保留原始值
     df_output.to_excel(output_file, index=False)
     print(f"数据处理完成，结果已保存到 {output_file}")
-    return df_output
+    
+    ## 返回转换类型并计算派生指标后的数据
+    return add_derived_metrics(normalize_dtypes(df_output))
 
 ## 使用示例
 if __name__ == "__main__":
@@ -2,14 +2,10 @@
 ## -*- coding: utf-8 -*-
 
 import argparse
-import requests
 import json
-from datetime import datetime
 import logging
-import urllib3
 
-## 禁用 SSL 警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+logger = logging.getLogger(__name__)
 
 def get_single_weibo(weibo_id, headers=None):
     """获取指定ID的单条微博信息"""
@@ -18,10 +14,19 @@ def get_single_weibo(weibo_id, headers=None):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/86.0.4240.111 Safari/537.36'
         }
     
+    ## 只取一条微博，用标准库请求即可，省去导入 requests 的启动开销
+    import ssl
+    import urllib.request
+
     try:
         url = f"<https://m.weibo.cn/detail/{weibo_id}>"
-        response = requests.get(url, headers=headers, verify=False)
-        html = response.text
+        ## 不校验证书，与原先 verify=False 一致
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        request = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(request, context=context) as response:
+            html = response.read().decode('utf-8', errors='replace')
         html = html[html.find('"status":'):]
         html = html[:html.rfind('"call"')]
         html = html[:html.rfind(",")]